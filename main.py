@@ -16,11 +16,22 @@ if str(SRC) not in sys.path:
 from src.detect import detect_objects  # noqa: E402
 
 
+# Ultralytics' default 20-color palette, stored as BGR
+_PALETTE: Tuple[Tuple[int, int, int], ...] = (
+    (56, 56, 255), (151, 157, 255), (31, 112, 255), (29, 178, 255),
+    (49, 210, 207), (10, 249, 72), (23, 204, 146), (134, 219, 61),
+    (52, 147, 26), (187, 212, 0), (168, 153, 44), (255, 194, 0),
+    (147, 69, 52), (255, 115, 100), (236, 24, 0), (255, 56, 132),
+    (133, 0, 82), (255, 56, 203), (200, 149, 255), (199, 55, 255),
+)
+
+
 def _color_for_label(label: str) -> Tuple[int, int, int]:
-    """Deterministic BGR color for a label."""
-    seed = abs(hash(label)) % (2**32)
-    rng = np.random.default_rng(seed)
-    return tuple(int(c) for c in rng.integers(0, 255, size=3))  # B, G, R
+    """Deterministic BGR color for a label (FNV-1a, stable across runs)."""
+    h = 2166136261
+    for b in label.encode():
+        h = ((h ^ b) * 16777619) & 0xFFFFFFFF
+    return _PALETTE[h % len(_PALETTE)]  # B, G, R
 
 
 def main() -> int:
@@ -36,17 +47,19 @@ def main() -> int:
         print(f"Image not found: {image_path}")
         return 1
 
-    objects = detect_objects(str(image_path))
+    # Decode once and hand the same array to detection and visualization
+    image = cv2.imread(str(image_path))
+    if image is None:
+        print(f"Could not read image: {image_path}")
+        return 1
+
+    objects = detect_objects(image)
 
     if not objects:
         print("No objects detected.")
         return 0
 
     # Visualize masks and boxes
-    image = cv2.imread(str(image_path))
-    if image is None:
-        print(f"Could not read image for visualization: {image_path}")
-        return 1
     overlay = image.copy()
 
     for obj in objects:
@@ -55,8 +68,8 @@ def main() -> int:
 
         color = _color_for_label(obj["label"])
         if obj["mask"] is not None:
-            mask = obj["mask"].astype(bool)
-            overlay[mask] = color  # fill mask
+            # Masked copy fills in place without materializing an index array
+            np.copyto(overlay, np.array(color, dtype=np.uint8), where=obj["mask"][:, :, None])
         # Draw bounding box and label
         x1, y1, x2, y2 = obj["box"]
         cv2.rectangle(image, (x1, y1), (x2, y2), color, 2)
@@ -72,8 +85,8 @@ def main() -> int:
         )
 
     # Blend overlay (masks) with original
-    blended = cv2.addWeighted(image, 0.6, overlay, 0.4, 0)
-    cv2.imwrite(str(output_path), blended)
+    cv2.addWeighted(image, 0.6, overlay, 0.4, 0, dst=image)
+    cv2.imwrite(str(output_path), image)
     print(f"Saved visualization to {output_path}")
     return 0
 
@@ -1,6 +1,41 @@
+import threading
+
 import cv2
 import numpy as np
 
+# Spectral-residual detector is created once and reused across calls.
+# cv2.saliency ships only with opencv-contrib; without it saliency is zero.
+_SALIENCY = (
+    cv2.saliency.StaticSaliencySpectralResidual_create()
+    if hasattr(cv2, "saliency")
+    else None
+)
+# computeSaliency mutates the detector's internal buffers, so calls from
+# multiple threads have to take turns on the shared instance.
+_SALIENCY_LOCK = threading.Lock()
+
+# Hiding-spot corners as (x, y) fractions of the free span inside the box,
+# in order of preference: bottom-right, bottom-left, top-right, top-left.
+_CORNERS = np.array([[1, 1], [0, 1], [1, 0], [0, 0]], dtype=np.int64)
+
+
+def _saliency_map(image: np.ndarray) -> np.ndarray:
+    """uint8 spectral-residual saliency of `image` at half resolution."""
+    img_h, img_w = image.shape[:2]
+    # Spectral residual works on a 64x64 spectrum internally, so a half-size
+    # input gives the same signal; box coords are halved when sampling it.
+    sal_h, sal_w = (img_h + 1) // 2, (img_w + 1) // 2
+    if _SALIENCY is not None:
+        small = cv2.resize(image, (sal_w, sal_h), interpolation=cv2.INTER_AREA)
+        with _SALIENCY_LOCK:
+            success, saliency_map = _SALIENCY.computeSaliency(small)
+    else:
+        success, saliency_map = False, None
+
+    if not success or saliency_map is None:
+        return np.zeros((sal_h, sal_w), dtype=np.uint8)
+    return (saliency_map * 255).astype(np.uint8)
+
 
 def decide_hiding_spot(image: np.ndarray, objects: list, batman_size: tuple):
     """
@@ -17,59 +52,45 @@ def decide_hiding_spot(image: np.ndarray, objects: list, batman_size: tuple):
     img_h, img_w = image.shape[:2]
     batman_w, batman_h = batman_size
 
-    saliency = cv2.saliency.StaticSaliencySpectralResidual_create()
-    success, saliency_map = saliency.computeSaliency(image)
-
-    if not success or saliency_map is None:
-        saliency_map = np.zeros((img_h, img_w), dtype=np.uint8)
-    else:
-        saliency_map = (saliency_map * 255).astype(np.uint8)
+    boxes = np.array([obj["box"] for obj in objects], dtype=np.int64).reshape(-1, 4)
+    x1s = np.clip(boxes[:, 0], 0, img_w - 1)
+    y1s = np.clip(boxes[:, 1], 0, img_h - 1)
+    x2s = np.clip(boxes[:, 2], 1, img_w)
+    y2s = np.clip(boxes[:, 3], 1, img_h)
 
-    image_area = float(img_w * img_h)
-    best_score = float("-inf")
-    best_object = None
-    best_location = (0, 0)
+    valid = (x2s > x1s) & (y2s > y1s)
+    if not valid.any():
+        return None, (0, 0)
 
-    for obj in objects:
-        x1, y1, x2, y2 = obj["box"]
-
-        x1 = int(np.clip(x1, 0, img_w - 1))
-        y1 = int(np.clip(y1, 0, img_h - 1))
-        x2 = int(np.clip(x2, 1, img_w))
-        y2 = int(np.clip(y2, 1, img_h))
-
-        if x2 <= x1 or y2 <= y1:
-            continue
-
-        width = x2 - x1
-        height = y2 - y1
-        area_score = (width * height) / image_area
-
-        region = saliency_map[y1:y2, x1:x2]
-        mean_saliency = float(np.mean(region)) if region.size > 0 else 0.0
-        low_saliency_score = 1.0 - (mean_saliency / 255.0)
-
-        combined_score = area_score + low_saliency_score
-
-        if combined_score > best_score:
-            best_score = combined_score
-            best_object = obj
-
-            candidates = [
-                (x2 - batman_w, y2 - batman_h),
-                (x1, y2 - batman_h),
-                (x2 - batman_w, y1),
-                (x1, y1),
-            ]
-
-            hide_x, hide_y = 0, 0
-            for cx, cy in candidates:
-                cx = int(np.clip(cx, 0, max(0, img_w - batman_w)))
-                cy = int(np.clip(cy, 0, max(0, img_h - batman_h)))
-                if cx + batman_w <= img_w and cy + batman_h <= img_h:
-                    hide_x, hide_y = cx, cy
-                    break
-
-            best_location = (hide_x, hide_y)
-
-    return best_object, best_location
+    if np.count_nonzero(valid) == 1:
+        # A lone candidate wins whatever its score, so skip the saliency pass
+        best_idx = int(np.argmax(valid))
+    else:
+        area_score = (x2s - x1s) * (y2s - y1s) / float(img_w * img_h)
+
+        # Box means from a summed-area table: four lookups per object instead
+        # of a reduction over every pixel in the box.
+        sal_ii = cv2.integral(_saliency_map(image))
+        sx1, sy1 = x1s >> 1, y1s >> 1
+        sx2, sy2 = (x2s + 1) >> 1, (y2s + 1) >> 1
+        sal_sum = sal_ii[sy2, sx2] - sal_ii[sy1, sx2] - sal_ii[sy2, sx1] + sal_ii[sy1, sx1]
+        sal_area = np.maximum((sx2 - sx1) * (sy2 - sy1), 1)
+        low_saliency_score = 1.0 - (sal_sum / sal_area / 255.0)
+
+        combined_score = np.where(valid, area_score + low_saliency_score, -np.inf)
+        best_idx = int(np.argmax(combined_score))
+
+    best_object = objects[best_idx]
+    box_lo = np.array([x1s[best_idx], y1s[best_idx]])
+    box_hi = np.array([x2s[best_idx], y2s[best_idx]])
+    sprite = np.array([batman_w, batman_h])
+    img_size = np.array([img_w, img_h])
+
+    candidates = box_lo + _CORNERS * (box_hi - sprite - box_lo)
+    candidates = np.clip(candidates, 0, np.maximum(0, img_size - sprite))
+    fits = (candidates + sprite <= img_size).all(axis=1)
+    if not fits.any():
+        return best_object, (0, 0)
+
+    hide_x, hide_y = candidates[int(np.argmax(fits))]
+    return best_object, (int(hide_x), int(hide_y))
@@ -1,16 +1,23 @@
 """For melrita"""
 # detect.py
 from functools import lru_cache
-from typing import List, Dict, Tuple, Union
+from typing import List, Dict, Optional, Sequence, Tuple, Union
 import cv2
 import numpy as np
+import torch.nn.functional as F
 from ultralytics import YOLO
 
 ImageLike = Union[str, np.ndarray]
 
-@lru_cache(maxsize=1)
-def _load_model(weights: str) -> YOLO:
-    return YOLO(weights)
+@lru_cache(maxsize=4)
+def _load_model(weights: str, device: Optional[str] = None) -> YOLO:
+    # Exported weights (.onnx, .engine, _openvino_model/) carry no task metadata
+    # for YOLO to infer from, so pin it; lets INT8/TensorRT exports drop in.
+    model = YOLO(weights, task="segment")
+    # Warm up once on the target device so the first real frame doesn't pay for
+    # predictor setup, layer fusion, or cuDNN autotuning
+    model.predict(np.zeros((640, 640, 3), dtype=np.uint8), device=device, verbose=False)
+    return model
 
 def _to_image_array(image: ImageLike) -> np.ndarray:
     if isinstance(image, str):
@@ -22,52 +29,83 @@ def _to_image_array(image: ImageLike) -> np.ndarray:
         return image
     raise TypeError("image must be a file path or a numpy array")
 
-def detect_objects(
-    image: ImageLike,
-    model_path: str = "yolov8n-seg.pt",
-    conf: float = 0.25,
-) -> List[Dict[str, object]]:
-    """
-    Run YOLOv8 segmentation and return a list of objects with label, box, and mask.
-    box -> (x1, y1, x2, y2) ints in pixel coords
-    mask -> boolean np.ndarray aligned to the input image (H, W)
-    """
-    frame = _to_image_array(image)
-    h, w = frame.shape[:2]
-
-    model = _load_model(model_path)
-    result = model.predict(frame, conf=conf, verbose=False)[0]
-
+def _result_to_objects(result, names, h: int, w: int) -> List[Dict[str, object]]:
+    """Convert one Ultralytics result into label/box/mask dicts for an (h, w) frame."""
     boxes = result.boxes
     masks = result.masks
-    names = getattr(model.model, "names", None) or model.names
 
     objects = []
     if boxes is None:
         return objects
 
-    for i, box in enumerate(boxes):
-        x1, y1, x2, y2 = box.xyxy[0].cpu().numpy().tolist()
-        cls_id = int(box.cls)
+    # Resize and threshold every mask in one batched op on the model's device,
+    # then copy the boolean stack to host once.
+    mask_stack = None
+    if masks is not None and len(masks.data):
+        mask_t = masks.data
+        if tuple(mask_t.shape[-2:]) != (h, w):
+            mask_t = F.interpolate(
+                mask_t.unsqueeze(1).float(), size=(h, w), mode="bilinear", align_corners=False
+            ).squeeze(1)
+        mask_stack = (mask_t > 0.5).cpu().numpy()
+
+    # One device-to-host copy each for boxes and classes instead of one per box
+    xyxy = np.rint(boxes.xyxy.cpu().numpy()).astype(np.int32).tolist()
+    cls_ids = boxes.cls.cpu().numpy().astype(np.int32).tolist()
+
+    for i, (box, cls_id) in enumerate(zip(xyxy, cls_ids)):
         label = names[cls_id] if names and cls_id in names else str(cls_id)
 
         mask_bool = None
-        if masks is not None and len(masks.data) > i:
-            mask_np = masks.data[i].cpu().numpy()
-            # Resize to original frame size if needed
-            if mask_np.shape[:2] != (h, w):
-                mask_np = cv2.resize(mask_np, (w, h), interpolation=cv2.INTER_LINEAR)
-            mask_bool = mask_np > 0.5
+        if mask_stack is not None and len(mask_stack) > i:
+            mask_bool = mask_stack[i]
 
         objects.append(
             {
                 "label": label,
-                "box": (int(round(x1)), int(round(y1)), int(round(x2)), int(round(y2))),
+                "box": tuple(box),
                 "mask": mask_bool,
             }
         )
     return objects
 
+def detect_objects(
+    image: ImageLike,
+    model_path: str = "yolov8n-seg.pt",
+    conf: float = 0.25,
+    device: Optional[str] = None,
+) -> List[Dict[str, object]]:
+    """
+    Run YOLOv8 segmentation and return a list of objects with label, box, and mask.
+    box -> (x1, y1, x2, y2) ints in pixel coords
+    mask -> boolean np.ndarray aligned to the input image (H, W)
+    device -> e.g. "cpu", "cuda:0"; None lets Ultralytics pick
+    """
+    return detect_objects_batch([image], model_path=model_path, conf=conf, device=device)[0]
+
+def detect_objects_batch(
+    images: Sequence[ImageLike],
+    model_path: str = "yolov8n-seg.pt",
+    conf: float = 0.25,
+    device: Optional[str] = None,
+) -> List[List[Dict[str, object]]]:
+    """
+    Same as detect_objects for several images, run through YOLO as one batch.
+    Returns one object list per input image, in input order.
+    """
+    frames = [_to_image_array(image) for image in images]
+    if not frames:
+        return []
+
+    model = _load_model(model_path, device)
+    results = model.predict(frames, conf=conf, device=device, verbose=False)
+    names = getattr(model.model, "names", None) or model.names
+
+    return [
+        _result_to_objects(result, names, *frame.shape[:2])
+        for frame, result in zip(frames, results)
+    ]
+
 if __name__ == "__main__":
     img = "sample.jpg"
     objs = detect_objects(img)